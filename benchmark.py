@@ -0,0 +1,97 @@
+"""
+Сравнение способов выбора вершины в MCS-M+ (см. TIE_BREAKS в hypergraph_utils).
+
+Для каждого способа на одних и тех же случайных гиперграфах выводятся среднее количество
+ребер заполнения и генераторов минимальной триангуляции и среднее время всего поиска
+кликовых минимальных сепараторов.
+
+Пример: python benchmark.py --nodes 500 --edges 400 --edge-size 4 --instances 5
+"""
+import argparse
+import random
+from time import perf_counter
+
+from hypernetx import Hypergraph
+
+from hypergraph_utils import TIE_BREAKS, compress_twin_vertices, find_minimal_clique_separators, \
+    find_minimal_triangulation, generate_hypergraph
+
+
+def generate_sparse_hypergraph(n: int, k: int, edge_size: int, rng: random.Random) -> Hypergraph:
+    """
+    Связный гиперграф из небольших гиперребер: каждое следующее гиперребро
+    пересекается с уже построенными хотя бы по одной вершине.
+
+    @param n: количество вершин
+    @param k: количество гиперребер
+    @param edge_size: наибольший размер гиперребра
+    @param rng: генератор случайных чисел
+    @return: случайный гиперграф
+    """
+    nodes = [f"v{i + 1}" for i in range(n)]
+    edges = {}
+    used = [rng.choice(nodes)]
+    for i in range(k):
+        size = rng.randint(2, max(2, edge_size))
+        edge = {rng.choice(used), *rng.sample(nodes, size - 1)}
+        used.extend(edge)
+        edges[f"e{i + 1}"] = list(edge)
+
+    # изолированные вершины добавляются в случайные гиперребра
+    labels = list(edges)
+    for node in set(nodes) - set(used):
+        edges[rng.choice(labels)].append(node)
+
+    return Hypergraph(edges)
+
+
+def run(hypergraphs: list[Hypergraph], tie_break: str, restarts: int) -> dict[str, float]:
+    """
+    @return: средние количество ребер заполнения, генераторов и время поиска сепараторов
+    """
+    fill = generators = elapsed = 0
+    for hg in hypergraphs:
+        start = perf_counter()
+        find_minimal_clique_separators(hg, tie_break=tie_break, restarts=restarts)
+        elapsed += perf_counter() - start
+
+        g, _ = compress_twin_vertices(hg)
+        h, _, found = find_minimal_triangulation(g, tie_break=tie_break, restarts=restarts)
+        fill += h.number_of_fill_edges()
+        generators += len(found)
+
+    count = len(hypergraphs)
+    return {"fill": fill / count, "generators": generators / count, "time": elapsed / count}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Сравнение способов выбора вершины в MCS-M+")
+    parser.add_argument("--nodes", type=int, default=300)
+    parser.add_argument("--edges", type=int, default=300)
+    parser.add_argument("--edge-size", type=int, default=4,
+                        help="наибольший размер гиперребра (0 - гиперграфы generate_hypergraph)")
+    parser.add_argument("--instances", type=int, default=5)
+    parser.add_argument("--restarts", type=int, default=8, help="количество запусков для \"random\"")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tie-breaks", nargs="+", default=list(TIE_BREAKS), choices=TIE_BREAKS)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    if args.edge_size > 0:
+        instances = [
+            generate_sparse_hypergraph(args.nodes, args.edges, args.edge_size, rng)
+            for _ in range(args.instances)
+        ]
+    else:
+        random.seed(args.seed)
+        instances = [generate_hypergraph(args.nodes, args.edges) for _ in range(args.instances)]
+
+    # первый запуск на каждом гиперграфе не учитывается: в нем время уходит еще и на
+    # заполнение внутренних кешей объекта Hypergraph
+    for hg in instances:
+        find_minimal_clique_separators(hg)
+
+    print(f"{'способ':<15}{'ребер заполнения':>18}{'генераторов':>14}{'время, с':>12}")
+    for name in args.tie_breaks:
+        result = run(instances, name, args.restarts if name == "random" else 1)
+        print(f"{name:<15}{result['fill']:>18.1f}{result['generators']:>14.1f}{result['time']:>12.3f}")
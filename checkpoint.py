@@ -0,0 +1,247 @@
+import hashlib
+import os
+from time import perf_counter
+
+import numpy as np
+from networkx import Graph
+
+from csr_graph import CSRGraph
+from filled_graph import FilledGraph
+from separator_set import SeparatorSet
+
+# версия формата снимка
+_FORMAT = 2
+
+
+class Checkpoint:
+    """
+    Периодические снимки состояния поиска сепараторов на диске.
+
+    В снимок попадают метки еще не пронумерованных вершин, начало MEO, вершины-генераторы,
+    ребра заполнения, а после триангуляции - позиция поиска сепараторов, отделенные
+    вершины и найденные сепараторы. Вершины хранятся номерами в порядке сортировки repr
+    имен, а не в порядке g.nodes: порядок вершин построенного графа может зависеть от хешей
+    строк и меняться от процесса к процессу, а имена могут быть разных типов. Снимок
+    подходит только для того же графа, это проверяется по отпечатку графа.
+
+    Снимок сначала пишется во временный файл, который затем атомарно заменяет старый,
+    так что при аварийном завершении на диске всегда остается целый снимок.
+    """
+
+    def __init__(
+            self,
+            path: str,
+            every: int | None = 10000,
+            interval: float | None = None,
+            resume: bool = False
+    ):
+        """
+        @param path: файл снимка (.npz)
+        @param every: сохранять снимок через каждые every обработанных вершин
+        @param interval: сохранять снимок не реже, чем раз в interval секунд
+        @param resume: продолжить с последнего снимка, если он есть
+        """
+        self.path = path
+        self.every = every
+        self.interval = interval
+        self.resume = resume
+        self.saved = 0  # сколько снимков сохранено
+
+        self._nodes: list[str] | None = None  # вершины в порядке g.nodes
+        self._names: list[str] | None = None  # вершины в порядке их номеров в снимке
+        self._ids: dict[str, int] | None = None
+        self._fingerprint: np.ndarray | None = None
+        self._tie_break = "first"
+        self._snapshot: dict[str, np.ndarray] | None = None  # загруженный снимок
+        self._triangulation: tuple[np.ndarray, np.ndarray, np.ndarray] | None = None
+        self._steps = 0
+        self._last = perf_counter()
+
+    def attach(self, g: Graph | CSRGraph, tie_break: str = "first"):
+        """
+        Связывает снимки с графом; при возобновлении загружает последний снимок
+
+        @param g: граф, в котором ищутся сепараторы
+        @param tie_break: способ выбора вершины в MCS-M+ (продолжать можно только тем же способом)
+        @raise ValueError: снимок сделан для другого графа или другим способом выбора вершины
+        """
+        self._nodes = list(g.nodes)
+        self._names = sorted(self._nodes, key=repr)
+        self._ids = {name: i for i, name in enumerate(self._names)}
+        self._fingerprint = _fingerprint(g, self._names, self._ids)
+        self._tie_break = tie_break
+        self._snapshot = None
+        self._triangulation = None
+
+        if self.resume and os.path.exists(self.path):
+            with np.load(self.path) as data:
+                snapshot = dict(data)
+            if int(snapshot["format"]) != _FORMAT:
+                raise ValueError(f"Неизвестная версия снимка: {int(snapshot['format'])}")
+            if not np.array_equal(snapshot["fingerprint"], self._fingerprint):
+                raise ValueError(f"Снимок {self.path} сделан для другого графа")
+            # в снимках без способа выбора вершины он всегда был "first"
+            saved_tie_break = str(snapshot.get("tie_break", "first"))
+            if saved_tie_break != tie_break:
+                raise ValueError(f"Снимок {self.path} сделан со способом выбора вершины {saved_tie_break}")
+            self._snapshot = snapshot
+            if len(snapshot["label"]) == 0:
+                self._triangulation = snapshot["meo"], snapshot["generators"], snapshot["fill"]
+
+        self._steps = 0
+        self._last = perf_counter()
+
+    def due(self) -> bool:
+        """
+        Учитывает одну обработанную вершину
+
+        @return: пора ли сохранить снимок
+        """
+        self._steps += 1
+        if self.every is not None and self._steps >= self.every:
+            return True
+        return self.interval is not None and perf_counter() - self._last >= self.interval
+
+    def restore_triangulation(
+            self
+    ) -> tuple[dict[str, int], int, list[str], list[str], list[tuple[str, str]]] | None:
+        """
+        @return: метки, s, начало MEO, генераторы и ребра заполнения из снимка
+            (None, если снимка нет)
+        """
+        if self._snapshot is None:
+            return None
+        names = self._names
+        # метки восстанавливаются в порядке g.nodes, как и при запуске без снимка
+        labels = self._snapshot["label"]
+        label = {}
+        if len(labels) != 0:
+            for node in self._nodes:
+                l = int(labels[self._ids[node]])
+                if l >= 0:
+                    label[node] = l
+        meo = [names[i] for i in self._snapshot["meo"]]
+        generators = [names[i] for i in self._snapshot["generators"]]
+        fill = [(names[u], names[v]) for u, v in self._snapshot["fill"]]
+        return label, int(self._snapshot["s"]), meo, generators, fill
+
+    def restore_sweep(self) -> tuple[int, set[str], set[frozenset[str]]] | None:
+        """
+        @return: позиция поиска сепараторов, отделенные вершины и найденные сепараторы
+            (None, если в снимке поиск сепараторов еще не начат)
+        """
+        if self._snapshot is None or int(self._snapshot["position"]) < 0:
+            return None
+        names = self._names
+        removed = {names[i] for i in self._snapshot["removed"]}
+        separators = SeparatorSet(
+            self._snapshot["separators_indptr"],
+            self._snapshot["separators_indices"],
+            names
+        ).as_set()
+        return int(self._snapshot["position"]), removed, separators
+
+    def save_triangulation(
+            self,
+            label: dict[str, int],
+            s: int,
+            meo: list[str],
+            generators: list[str],
+            h: FilledGraph
+    ):
+        """
+        Сохраняет снимок состояния MCS-M+
+        """
+        labels = np.full(len(self._names), -1, dtype=np.int32)
+        for node, l in label.items():
+            labels[self._ids[node]] = l
+        self._write(labels, s, *self._encode_triangulation(meo, generators, h), -1, [], [])
+
+    def finish_triangulation(self, meo: list[str], generators: list[str], h: FilledGraph):
+        """
+        Сохраняет готовую триангуляцию (если она не была целиком загружена из снимка)
+        """
+        if self._triangulation is None:
+            self._triangulation = self._encode_triangulation(meo, generators, h)
+            self._write(np.zeros(0, dtype=np.int32), -1, *self._triangulation, -1, [], [])
+
+    def save_sweep(self, position: int, removed: set[str], separators: set[frozenset[str]]):
+        """
+        Сохраняет снимок поиска сепараторов (триангуляция к этому моменту уже готова)
+        """
+        self._write(np.zeros(0, dtype=np.int32), -1, *self._triangulation, position, removed, separators)
+
+    def _encode_triangulation(
+            self,
+            meo: list[str],
+            generators: list[str],
+            h: FilledGraph
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        ids = self._ids
+        fill = np.fromiter(
+            (ids[node] for edge in h.fill_edges() for node in edge),
+            dtype=np.int32,
+            count=2 * h.number_of_fill_edges()
+        )
+        return (
+            np.fromiter((ids[node] for node in meo), dtype=np.int32, count=len(meo)),
+            np.fromiter((ids[node] for node in generators), dtype=np.int32, count=len(generators)),
+            fill.reshape(-1, 2),
+        )
+
+    def _write(
+            self,
+            label: np.ndarray,
+            s: int,
+            meo: np.ndarray,
+            generators: np.ndarray,
+            fill: np.ndarray,
+            position: int,
+            removed: set[str],
+            separators: set[frozenset[str]]
+    ):
+        # номера вершин сепараторов - это номера вершин в снимке, поэтому таблица имен
+        # не сохраняется (и имена вершин могут быть любого типа)
+        separators = SeparatorSet.from_separators(separators, self._names)
+        temporary = self.path + ".tmp"
+        with open(temporary, "wb") as f:
+            np.savez(
+                f,
+                format=_FORMAT,
+                fingerprint=self._fingerprint,
+                tie_break=self._tie_break,
+                label=label,
+                s=s,
+                meo=meo,
+                generators=generators,
+                fill=fill,
+                position=position,
+                removed=np.fromiter((self._ids[node] for node in removed), dtype=np.int32, count=len(removed)),
+                separators_indptr=separators.indptr,
+                separators_indices=separators.indices,
+            )
+        os.replace(temporary, self.path)
+
+        self.saved += 1
+        self._steps = 0
+        self._last = perf_counter()
+
+
+def _fingerprint(g: Graph | CSRGraph, names: list[str], ids: dict[str, int]) -> np.ndarray:
+    """
+    @param names: вершины в порядке сортировки
+    @param ids: номера вершин в этом порядке
+    @return: хеш имен вершин и списков смежности графа (не зависит от порядка g.nodes)
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    # repr различает имена разных типов: вершины 1 и "1" дают разные отпечатки
+    digest.update(repr(names).encode("utf-8"))
+
+    degrees = np.zeros(len(names), dtype=np.int64)
+    for i, node in enumerate(names):
+        row = np.sort(np.fromiter((ids[y] for y in g.neighbors(node)), dtype=np.int32))
+        digest.update(row.tobytes())
+        degrees[i] = len(row)
+    digest.update(degrees.tobytes())
+
+    return np.frombuffer(digest.digest(), dtype=np.uint8)
@@ -0,0 +1,325 @@
+from typing import Iterable
+
+import numpy as np
+
+from filled_graph import FilledGraph
+from separator_set import SeparatorSet
+
+
+class CliqueTreeIndex:
+    """
+    Индекс для повторных запросов о кликовых минимальных сепараторах одного графа.
+
+    Строится один раз по минимальной триангуляции, MEO и сепараторам:
+        1) из MEO (совершенного порядка исключения триангуляции) строится дерево клик триангуляции
+        2) ребра дерева, метки которых не являются кликовыми минимальными сепараторами,
+           стягиваются - получается дерево атомов, ребра которого помечены сепараторами
+
+    Для каждой вершины хранятся списки содержащих ее атомов и сепараторов, для дерева атомов -
+    таблица двоичных подъемов для поиска наименьшего общего предка.
+    """
+
+    def __init__(
+            self,
+            atoms: SeparatorSet,
+            separators: SeparatorSet,
+            parent: np.ndarray,
+            cut_ptr: np.ndarray,
+            cut_atoms: np.ndarray
+    ):
+        """
+        @param atoms: атомы графа
+        @param separators: кликовые минимальные сепараторы графа
+        @param parent: родитель каждого атома в дереве атомов (у корня - он сам)
+        @param cut_ptr, cut_atoms: для сепаратора с номером i - атомы
+            cut_atoms[cut_ptr[i]:cut_ptr[i + 1]], ребро к родителю которых помечено
+            подмножеством этого сепаратора (такие ребра разрываются при его удалении)
+        """
+        self.atoms = atoms
+        self.separators = separators
+        self.parent = parent
+        self.cut_ptr = cut_ptr
+        self.cut_atoms = cut_atoms
+
+        self.depth, self.tin, self.tout = _tree_order(parent)
+        self.up = _binary_lifting(parent)
+
+    @classmethod
+    def build(
+            cls,
+            h: FilledGraph,
+            meo: list[str],
+            separators: Iterable[frozenset[str]],
+            twins: dict[str, list[str]] | None = None
+    ) -> "CliqueTreeIndex":
+        """
+        @param h: минимальная триангуляция связного графа
+        @param meo: minimal elimination ordering
+        @param separators: все кликовые минимальные сепараторы графа
+        @param twins: классы близнецов, если граф - фактор-граф (см. compress_twin_vertices)
+        @return: индекс этого графа (в исходных вершинах, если переданы классы близнецов)
+        """
+        separators = set(separators)
+        rank = {x: i for i, x in enumerate(meo)}
+
+        # соседи вершины в триангуляции, которые исключаются позже нее,
+        # и ближайшая из них по порядку исключения (родитель в дереве исключения)
+        madj = {x: [y for y in h.neighbors(x) if rank[y] < rank[x]] for x in meo}
+        parent = {x: max(madj[x], key=rank.get) if len(madj[x]) != 0 else None for x in meo}
+
+        # клика {x} + madj(x) не максимальна, если ее целиком содержит клика ребенка x;
+        # тогда x относится к максимальной клике этого ребенка
+        clique_of = {}
+        absorbed_by = {}
+        for x in reversed(meo):
+            clique_of[x] = clique_of[absorbed_by[x]] if x in absorbed_by else x
+            p = parent[x]
+            if p is not None and len(madj[x]) == len(madj[p]) + 1:
+                absorbed_by[p] = x
+
+        cliques = {c: i for i, c in enumerate(dict.fromkeys(clique_of.values()))}
+        clique_nodes = [set() for _ in cliques]
+        for c, i in cliques.items():
+            clique_nodes[i].update(madj[c])
+            clique_nodes[i].add(c)
+
+        # ребра дерева клик с метками; ребра, метки которых не сепараторы графа, стягиваются
+        tree_edges = []
+        union = list(range(len(cliques)))
+        for x in meo:
+            p = parent[x]
+            if p is None or clique_of[x] == clique_of[p]:
+                continue
+            a, b = cliques[clique_of[x]], cliques[clique_of[p]]
+            label = frozenset(madj[x])
+            if label in separators:
+                tree_edges.append((a, b, label))
+            else:
+                union[_find(union, a)] = _find(union, b)
+
+        atom_ids = {}
+        atom_nodes = []
+        for i in range(len(cliques)):
+            root = _find(union, i)
+            if root not in atom_ids:
+                atom_ids[root] = len(atom_nodes)
+                atom_nodes.append(set())
+            atom_nodes[atom_ids[root]].update(clique_nodes[i])
+
+        adjacency = [[] for _ in atom_nodes]
+        for a, b, label in tree_edges:
+            a, b = atom_ids[_find(union, a)], atom_ids[_find(union, b)]
+            adjacency[a].append((b, label))
+            adjacency[b].append((a, label))
+
+        # корень дерева атомов - атом первой вершины MEO
+        root = atom_ids[_find(union, cliques[clique_of[meo[0]]])]
+        atom_parent = np.full(len(atom_nodes), -1, dtype=np.int64)
+        atom_parent[root] = root
+        edge_label = {}
+        stack = [root]
+        while len(stack) != 0:
+            a = stack.pop()
+            for b, label in adjacency[a]:
+                if atom_parent[b] == -1:
+                    atom_parent[b] = a
+                    edge_label[b] = label
+                    stack.append(b)
+
+        if twins is not None:
+            expand = lambda nodes: frozenset(node for rep in nodes for node in twins[rep])
+            atom_nodes = [expand(nodes) for nodes in atom_nodes]
+            separators = {expand(separator) for separator in separators}
+            edge_label = {b: expand(label) for b, label in edge_label.items()}
+
+        # repr - потому что имена вершин могут быть разных типов
+        names = sorted({node for nodes in atom_nodes for node in nodes}, key=repr)
+        atoms = SeparatorSet.from_separators(atom_nodes, names)
+        separator_set = SeparatorSet.from_separators(separators, names)
+
+        # при удалении сепаратора S разрываются ребра дерева атомов,
+        # метки которых содержатся в S
+        cuts = [[] for _ in range(len(separator_set))]
+        for b, label in edge_label.items():
+            for i in _supersets(separator_set, label):
+                cuts[i].append(b)
+
+        cut_ptr = np.zeros(len(cuts) + 1, dtype=np.int64)
+        np.cumsum([len(c) for c in cuts], out=cut_ptr[1:])
+        cut_atoms = np.array([b for c in cuts for b in c], dtype=np.int64)
+
+        return cls(atoms, separator_set, atom_parent, cut_ptr, cut_atoms)
+
+    def is_separator(self, nodes: Iterable[str]) -> bool:
+        """
+        @return: является ли множество вершин кликовым минимальным сепаратором
+        @raise TypeError: передана строка, а не множество вершин
+        """
+        return nodes in self.separators
+
+    def separators_containing(self, node: str) -> list[frozenset[str]]:
+        """
+        @return: кликовые минимальные сепараторы, содержащие вершину
+        """
+        return [self.separators[i] for i in self.separators.containing(node)]
+
+    def atoms_containing(self, node: str) -> list[frozenset[str]]:
+        """
+        @return: атомы, содержащие вершину
+        """
+        return [self.atoms[i] for i in self.atoms.containing(node)]
+
+    def lca(self, a: int, b: int) -> int:
+        """
+        @param a, b: номера атомов
+        @return: номер их наименьшего общего предка в дереве атомов
+        """
+        if self.depth[a] < self.depth[b]:
+            a, b = b, a
+        diff = self.depth[a] - self.depth[b]
+        k = 0
+        while diff != 0:
+            if diff & 1:
+                a = self.up[k][a]
+            diff >>= 1
+            k += 1
+        if a == b:
+            return int(a)
+        for k in range(len(self.up) - 1, -1, -1):
+            if self.up[k][a] != self.up[k][b]:
+                a = self.up[k][a]
+                b = self.up[k][b]
+        return int(self.parent[a])
+
+    def separated(self, u: str, w: str, separator: Iterable[str]) -> bool:
+        """
+        Оказываются ли вершины в разных компонентах связности после удаления сепаратора.
+
+        Путь между атомами вершин в дереве атомов проходит через наименьшего общего предка;
+        вершины разделены, если на этом пути есть ребро, метка которого содержится
+        в сепараторе. Время: O(log n + количество таких ребер у сепаратора).
+
+        @param u, w: вершины, не входящие в сепаратор
+        @param separator: кликовый минимальный сепаратор
+        @return: разделяет ли сепаратор эти вершины
+        """
+        i = self.separators.index(separator)
+        if i is None:
+            raise ValueError(f"{set(separator)} не является кликовым минимальным сепаратором")
+        separator = self.separators[i]
+        if u in separator or w in separator:
+            raise ValueError("Вершина входит в сепаратор")
+
+        a, b = self._atom_of(u), self._atom_of(w)
+        if a == b:
+            return False
+        top = self.depth[self.lca(a, b)]
+
+        for c in self.cut_atoms[self.cut_ptr[i]:self.cut_ptr[i + 1]]:
+            if self.depth[c] > top and (self._is_ancestor(c, a) or self._is_ancestor(c, b)):
+                return True
+        return False
+
+    def save(self, path: str):
+        """
+        Сохраняет индекс в файл .npz (имена вершин сохраняются вместе с типом)
+
+        @raise TypeError: имя вершины - не строка и не целое число (см. SeparatorSet.to_bytes)
+        """
+        np.savez_compressed(
+            path,
+            atoms=np.frombuffer(self.atoms.to_bytes(), dtype=np.uint8),
+            separators=np.frombuffer(self.separators.to_bytes(), dtype=np.uint8),
+            parent=self.parent,
+            cut_ptr=self.cut_ptr,
+            cut_atoms=self.cut_atoms,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "CliqueTreeIndex":
+        """
+        @param path: файл, сохраненный методом save
+        @return: индекс
+        """
+        with np.load(path) as data:
+            return cls(
+                SeparatorSet.from_bytes(data["atoms"].tobytes()),
+                SeparatorSet.from_bytes(data["separators"].tobytes()),
+                data["parent"],
+                data["cut_ptr"],
+                data["cut_atoms"],
+            )
+
+    def _atom_of(self, node: str) -> int:
+        atoms = self.atoms.containing(node)
+        if len(atoms) == 0:
+            raise KeyError(f"Вершины {node} нет в графе")
+        return int(atoms[0])
+
+    def _is_ancestor(self, a: int, b: int) -> bool:
+        return self.tin[a] <= self.tin[b] and self.tout[b] <= self.tout[a]
+
+
+def _find(union: list[int], i: int) -> int:
+    while union[i] != i:
+        union[i] = union[union[i]]
+        i = union[i]
+    return i
+
+
+def _supersets(separators: SeparatorSet, nodes: frozenset[str]) -> set[int]:
+    """
+    @return: номера сепараторов, содержащих все вершины nodes
+    """
+    result = None
+    for node in sorted(nodes, key=lambda v: len(separators.containing(v))):
+        containing = set(separators.containing(node).tolist())
+        result = containing if result is None else result & containing
+        if len(result) == 0:
+            break
+    return result or set()
+
+
+def _tree_order(parent: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    @param parent: родители вершин дерева (у корня - он сам)
+    @return: глубина вершин и время входа и выхода при обходе в глубину
+    """
+    n = len(parent)
+    children = [[] for _ in range(n)]
+    roots = []
+    for v in range(n):
+        if parent[v] == v:
+            roots.append(v)
+        else:
+            children[parent[v]].append(v)
+
+    depth = np.zeros(n, dtype=np.int64)
+    tin = np.zeros(n, dtype=np.int64)
+    tout = np.zeros(n, dtype=np.int64)
+    timer = 0
+    for root in roots:
+        stack = [(root, False)]
+        while len(stack) != 0:
+            v, leaving = stack.pop()
+            if leaving:
+                tout[v] = timer
+                timer += 1
+                continue
+            tin[v] = timer
+            timer += 1
+            stack.append((v, True))
+            for c in children[v]:
+                depth[c] = depth[v] + 1
+                stack.append((c, False))
+    return depth, tin, tout
+
+
+def _binary_lifting(parent: np.ndarray) -> list[np.ndarray]:
+    """
+    @return: up[k][v] - предок вершины v на 2^k уровней выше (или корень)
+    """
+    up = [np.asarray(parent, dtype=np.int64)]
+    for _ in range(max(1, int(len(parent)).bit_length())):
+        up.append(up[-1][up[-1]])
+    return up
@@ -0,0 +1,249 @@
+import os
+import tempfile
+from typing import Iterable, Iterator
+
+import numpy as np
+from networkx import Graph
+
+# сколько байт памяти приходится на одну пару вершин при сортировке части ребер:
+# сам ключ, его копия при сортировке и результат np.unique
+_BYTES_PER_KEY = 3 * np.dtype(np.int64).itemsize
+
+
+class CSRGraph:
+    """
+    Неориентированный граф в формате CSR, хранящийся в отображаемых в память файлах.
+
+    Соседи вершины с номером i - indices[indptr[i]:indptr[i + 1]] (упорядочены по возрастанию).
+    Повторяет ту часть интерфейса networkx.Graph, которая нужна для поиска сепараторов.
+    """
+
+    def __init__(
+            self,
+            names: list[str],
+            indptr: np.ndarray,
+            indices: np.ndarray,
+            directory: tempfile.TemporaryDirectory | None = None
+    ):
+        self.names = names
+        self.indptr = indptr
+        self.indices = indices
+        self.ids = {name: i for i, name in enumerate(names)}
+
+        # срезы np.memmap заметно медленнее срезов обычного массива, поэтому строки
+        # смежности читаются через представления ndarray тех же файлов (без копирования)
+        self._indptr = np.asarray(indptr)
+        self._indices = np.asarray(indices)
+        # начала строк в виде списка чисел Python (строится при первом обращении);
+        # занимает O(n), как и таблицы names и ids
+        self._offsets: list[int] | None = None
+        self.graph = {}  # атрибуты графа, как у networkx.Graph
+
+        # временный каталог с файлами графа удаляется вместе с графом
+        self._directory = directory
+
+    @property
+    def nodes(self) -> list[str]:
+        return self.names
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def __contains__(self, node: str) -> bool:
+        return node in self.ids
+
+    def is_directed(self) -> bool:
+        return False
+
+    def neighbors(self, node: str) -> Iterator[str]:
+        # строка смежности один раз превращается в список чисел Python:
+        # поэлементный обход memmap создает отдельный скаляр numpy на каждого соседа
+        return map(self.names.__getitem__, self._row(self.ids[node]))
+
+    def degree(self, node: str) -> int:
+        i = self.ids[node]
+        return int(self._indptr[i + 1] - self._indptr[i])
+
+    def has_edge(self, u: str, v: str) -> bool:
+        i, j = self.ids.get(u), self.ids.get(v)
+        if i is None or j is None:
+            return False
+        row = self._indices[self._indptr[i]:self._indptr[i + 1]]
+        k = np.searchsorted(row, j)
+        return k < len(row) and row[k] == j
+
+    def edges(self) -> Iterator[tuple[str, str]]:
+        names = self.names
+        for i, name in enumerate(names):
+            for j in self._row(i):
+                if i < j:
+                    yield name, names[j]
+
+    def number_of_edges(self) -> int:
+        return len(self.indices) // 2
+
+    def to_graph(self) -> Graph:
+        """
+        @return: тот же граф в памяти в виде networkx.Graph
+        """
+        g = Graph()
+        g.add_nodes_from(self.names)
+        g.add_edges_from(self.edges())
+        g.graph.update(self.graph)
+        return g
+
+    def _row(self, i: int) -> list[int]:
+        """
+        @return: номера соседей вершины с номером i
+        """
+        if self._offsets is None:
+            self._offsets = self._indptr.tolist()
+        offsets = self._offsets
+        return self._indices[offsets[i]:offsets[i + 1]].tolist()
+
+    def close(self):
+        """
+        Удаляет временные файлы графа (если граф строился во временном каталоге)
+        """
+        if self._directory is not None:
+            self.indptr = self.indices = self._indptr = self._indices = self._offsets = None
+            self._directory.cleanup()
+            self._directory = None
+
+
+def build_csr_graph(
+        names: list[str],
+        edges: Iterable[np.ndarray],
+        memory_budget: int,
+        directory: str | None = None
+) -> CSRGraph:
+    """
+    Строит граф, в котором вершины каждого гиперребра образуют клику, не держа в памяти
+    список всех его ребер.
+
+    Гиперребра раскрываются в пары вершин по частям. Каждая часть сортируется,
+    очищается от повторов и сбрасывается на диск. Затем отсортированные части
+    сливаются в один массив смежности CSR, также лежащий на диске.
+
+    @param names: имена вершин (номер вершины - позиция в этом списке)
+    @param edges: гиперребра в виде массивов номеров вершин
+    @param memory_budget: сколько байт памяти можно занять парами вершин одновременно
+    @param directory: каталог для файлов графа (по умолчанию - временный каталог)
+    @return: граф в формате CSR
+    """
+    n = len(names)
+    max_keys = max(16, memory_budget // _BYTES_PER_KEY)
+
+    temporary = None
+    if directory is None:
+        temporary = tempfile.TemporaryDirectory(prefix="hypergraph_csr_")
+        directory = temporary.name
+
+    runs = []
+    for keys in _pair_chunks(edges, n, max_keys):
+        runs.append(_spill_run(keys, os.path.join(directory, f"run_{len(runs)}.bin")))
+
+    indptr, indices = _merge_runs(runs, n, max_keys, directory)
+
+    for run in runs:
+        os.remove(run)
+
+    return CSRGraph(names, indptr, indices, temporary)
+
+
+def _pair_chunks(edges: Iterable[np.ndarray], n: int, max_keys: int) -> Iterator[np.ndarray]:
+    """
+    @return: части упорядоченных пар вершин (u * n + v), в каждой не больше max_keys пар
+    """
+    chunk = []
+    size = 0
+    for nodes in edges:
+        nodes = np.asarray(nodes, dtype=np.int64)
+        k = len(nodes)
+        if k < 2:
+            continue
+
+        # большое гиперребро раскрывается по нескольку строк за раз
+        rows = max(1, max_keys // k)
+        for start in range(0, k, rows):
+            block = nodes[start:start + rows]
+            keys = (block[:, None] * n + nodes[None, :]).ravel()
+            keys = keys[keys // n != keys % n]
+
+            if size + len(keys) > max_keys and size != 0:
+                yield np.concatenate(chunk)
+                chunk = []
+                size = 0
+            chunk.append(keys)
+            size += len(keys)
+
+    if size != 0:
+        yield np.concatenate(chunk)
+
+
+def _spill_run(keys: np.ndarray, path: str) -> str:
+    """
+    Сохраняет отсортированную часть пар вершин без повторов на диск
+
+    @return: путь к файлу
+    """
+    np.unique(keys).tofile(path)
+    return path
+
+
+def _merge_runs(
+        runs: list[str],
+        n: int,
+        max_keys: int,
+        directory: str
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Слияние отсортированных частей в массив смежности CSR.
+
+    Из каждой части в память читается только блок фиксированного размера. За один шаг
+    из всех блоков берутся пары не больше наименьшего из последних элементов блоков:
+    все такие пары уже прочитаны, поэтому повторы между шагами невозможны.
+
+    @return: indptr и indices графа (отображаемые в память файлы)
+    """
+    index_type = np.int32 if n < 2 ** 31 else np.int64
+    indices_path = os.path.join(directory, "indices.bin")
+    indptr_path = os.path.join(directory, "indptr.bin")
+
+    sources = [np.memmap(run, dtype=np.int64, mode="r") for run in runs if os.path.getsize(run) != 0]
+    positions = [0] * len(sources)
+    block_size = max(1, max_keys // (2 * len(sources) + 2))
+    counts = np.zeros(n, dtype=np.int64)
+    nnz = 0
+
+    with open(indices_path, "wb") as out:
+        while True:
+            active = [i for i, source in enumerate(sources) if positions[i] < len(source)]
+            if len(active) == 0:
+                break
+
+            blocks = {i: sources[i][positions[i]:positions[i] + block_size] for i in active}
+            bound = min(block[-1] for block in blocks.values())
+
+            taken = []
+            for i, block in blocks.items():
+                end = int(np.searchsorted(block, bound, side="right"))
+                taken.append(np.asarray(block[:end]))
+                positions[i] += end
+
+            keys = np.unique(np.concatenate(taken))
+            counts += np.bincount(keys // n, minlength=n)
+            (keys % n).astype(index_type).tofile(out)
+            nnz += len(keys)
+
+    indptr = np.memmap(indptr_path, dtype=np.int64, mode="w+", shape=(n + 1,))
+    indptr[0] = 0
+    np.cumsum(counts, out=indptr[1:])
+    indptr.flush()
+
+    if nnz == 0:
+        return indptr, np.zeros(0, dtype=index_type)
+    return indptr, np.memmap(indices_path, dtype=index_type, mode="r", shape=(nnz,))
@@ -0,0 +1,74 @@
+from typing import Iterator
+
+from networkx import Graph
+
+from csr_graph import CSRGraph
+
+
+class FilledGraph:
+    """
+    Триангуляция графа без копирования исходного графа: исходный граф
+    плюс наложенные на него ребра заполнения (fill edges).
+
+    Исходный граф не изменяется, ребра заполнения хранятся отдельно.
+    """
+
+    def __init__(self, g: Graph | CSRGraph):
+        self.g = g
+        self.fill: dict[str, set[str]] = {}  # вершина -> соседи по ребрам заполнения
+
+    @property
+    def nodes(self):
+        return self.g.nodes
+
+    def __len__(self) -> int:
+        return len(self.g)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.g)
+
+    def __contains__(self, node: str) -> bool:
+        return node in self.g
+
+    def is_directed(self) -> bool:
+        return False
+
+    def add_fill_edge(self, u: str, v: str):
+        self.fill.setdefault(u, set()).add(v)
+        self.fill.setdefault(v, set()).add(u)
+
+    def neighbors(self, node: str) -> Iterator[str]:
+        yield from self.g.neighbors(node)
+        yield from self.fill.get(node, ())
+
+    def has_edge(self, u: str, v: str) -> bool:
+        return self.g.has_edge(u, v) or v in self.fill.get(u, ())
+
+    def fill_edges(self) -> Iterator[tuple[str, str]]:
+        """
+        @return: ребра заполнения (каждое ровно один раз)
+        """
+        seen = set()
+        for u, neighbors in self.fill.items():
+            seen.add(u)
+            for v in neighbors:
+                if v not in seen:
+                    yield u, v
+
+    def number_of_fill_edges(self) -> int:
+        return sum(len(neighbors) for neighbors in self.fill.values()) // 2
+
+    def edges(self) -> Iterator[tuple[str, str]]:
+        yield from self.g.edges()
+        yield from self.fill_edges()
+
+    def number_of_edges(self) -> int:
+        return self.g.number_of_edges() + self.number_of_fill_edges()
+
+    def to_graph(self) -> Graph:
+        """
+        @return: триангуляция в памяти в виде networkx.Graph
+        """
+        h = self.g.to_graph() if isinstance(self.g, CSRGraph) else Graph(self.g)
+        h.add_edges_from(self.fill_edges())
+        return h
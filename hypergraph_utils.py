@@ -1,81 +1,699 @@
-from random import random, sample, randint, choice
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import combinations, repeat
+from random import Random, random, sample, randint, choice
+from time import perf_counter
+from typing import Iterable, Iterator
 from hypernetx import Hypergraph
-from networkx import Graph, is_connected, connected_components
+import numpy as np
+import tracemalloc
+from networkx import Graph, articulation_points, biconnected_components
+
+from checkpoint import Checkpoint
+from clique_tree_index import CliqueTreeIndex
+from csr_graph import CSRGraph, build_csr_graph
+from filled_graph import FilledGraph
+from separator_set import SeparatorSet
+
+# способы выбора вершины в MCS-M+, если максимальная метка у нескольких вершин:
+#   "first" - первая в порядке вершин графа
+#   "min_degree" - вершина наименьшей степени
+#   "lexicographic" - вершина с наименьшим именем
+#   "min_fill" - вершина, среди еще не пронумерованных соседей которой меньше всего несмежных пар
+#   "random" - случайная вершина (с несколькими запусками остается лучшая триангуляция)
+TIE_BREAKS = ("first", "min_degree", "lexicographic", "min_fill", "random")
+
+
+def find_minimal_clique_separators(
+        hg: Hypergraph,
+        compress_twins: bool = True,
+        drop_subsumed: bool = True,
+        processes: int | None = 1,
+        memory_budget: int | None = None,
+        timings: dict[str, float] | None = None,
+        peak_memory: dict[str, int] | None = None,
+        checkpoint: Checkpoint | None = None,
+        tie_break: str = "first",
+        restarts: int = 1,
+        subsumed: dict[str, int] | None = None
+) -> set[frozenset[str]]:
+    """
+    @param hg: гиперграф
+    @param compress_twins: искать сепараторы на фактор-графе классов вершин-близнецов
+    @param drop_subsumed: отбросить гиперребра, содержащиеся в других гиперребрах
+    @param processes: количество процессов для поиска сепараторов по блокам двусвязности
+        (1 - искать во всем графе сразу, None - по количеству ядер)
+    @param memory_budget: если задан, граф смежности строится по частям на диске так,
+        чтобы пары вершин занимали не больше memory_budget байт (см. hypergraph_to_csr);
+        поиск сепараторов тогда идет во всем графе сразу. Ограничиваются только буферы
+        пар вершин: гиперребра, классы близнецов, таблица номеров вершин, ребра заполнения,
+        метки MCS-M+ и множества поиска сепараторов по-прежнему хранятся в памяти целиком
+    @param timings: если передан, в него записывается время каждого этапа в секундах
+        ("graph", "triangulation", "separators" или "blocks", "expand")
+    @param peak_memory: если передан, в него записывается для каждого этапа, сколько байт
+        памяти сверх уже занятой потребовалось этапу в пике (замеряется через tracemalloc,
+        который заметно замедляет работу; память процессов пула не учитывается)
+    @param checkpoint: если передан, состояние триангуляции и поиска сепараторов
+        периодически сохраняется на диск (см. Checkpoint и resume_minimal_clique_separators);
+        поиск тогда идет во всем графе сразу
+    @param tie_break: способ выбора вершины в MCS-M+ при равных метках (см. TIE_BREAKS)
+    @param restarts: количество запусков MCS-M+ при случайном выборе вершины
+    @param subsumed: если передан, в него записывается, сколько гиперребер ("edges")
+        и сколько пар вершин ("pairs") не пришлось раскрывать в граф смежности,
+        потому что гиперребра содержатся в других гиперребрах
+    @return: множество всех кликовых минимальных сепараторов
+    """
+    g = None
+    tracing = peak_memory is not None and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    stats = (timings, peak_memory)
+    try:
+        with _separator_errors():
+            # строим обычный граф для заданного гиперграфа
+            # (если пара вершин в гиперграфе смежны, то в обычном графе между ними есть ребро)
+            with _stage(stats, "graph"):
+                g, twins = _build_graph(hg, compress_twins, drop_subsumed, memory_budget)
+
+            if subsumed is not None:
+                subsumed["edges"] = g.graph["subsumed_edges"]
+                subsumed["pairs"] = g.graph["subsumed_pairs"]
+
+            if processes == 1 or isinstance(g, CSRGraph) or checkpoint is not None:
+                # находим:
+                #   1) минимальную триангуляцию этого графа (хордальный граф [одно и то же])
+                #   2) minimal elimination ordering
+                #   3) вершины, которые образуют минимальные сепараторы
+                with _stage(stats, "triangulation"):
+                    if checkpoint is not None:
+                        checkpoint.attach(g, tie_break)
+                    h, meo, generators = find_minimal_triangulation(
+                        g,
+                        checkpoint=checkpoint,
+                        tie_break=tie_break,
+                        restarts=restarts
+                    )
+
+                # находим минимальные кликовые сепараторы
+                with _stage(stats, "separators"):
+                    cliques = _find_clique_minimal_separators(g, h, meo, generators, checkpoint)
+            else:
+                with _stage(stats, "blocks"):
+                    cliques = find_block_clique_separators(g, processes, tie_break, restarts)
+
+            # возвращаемся от классов близнецов к исходным вершинам
+            if twins is not None:
+                with _stage(stats, "expand"):
+                    cliques = expand_twin_classes(cliques, twins)
+
+            return cliques
+    finally:
+        if isinstance(g, CSRGraph):
+            g.close()
+        if tracing:
+            tracemalloc.stop()
+
+
+def resume_minimal_clique_separators(
+        hg: Hypergraph,
+        path: str,
+        every: int | None = 10000,
+        interval: float | None = None,
+        **kwargs
+) -> set[frozenset[str]]:
+    """
+    Продолжает поиск сепараторов с последнего снимка (или начинает его, если снимка нет)
+    и дальше так же сохраняет снимки. Результат тот же, что и без перерыва.
+
+    @param hg: гиперграф (тот же, что и при создании снимка)
+    @param path: файл снимка
+    @param every, interval: частота снимков (см. Checkpoint)
+    @param kwargs: остальные параметры find_minimal_clique_separators (те же, что и при создании снимка)
+    @return: множество всех кликовых минимальных сепараторов
+    """
+    checkpoint = Checkpoint(path, every, interval, resume=True)
+    return find_minimal_clique_separators(hg, checkpoint=checkpoint, **kwargs)
 
 
-def find_minimal_clique_separators(hg: Hypergraph) -> set[frozenset[str]]:
+@contextmanager
+def _stage(stats: tuple[dict[str, float] | None, dict[str, int] | None], name: str):
+    """
+    Замеряет время этапа и прирост памяти в его пике
+    и записывает их в словари stats под именем name
+    """
+    timings, peak_memory = stats
+    if peak_memory is not None:
+        tracemalloc.reset_peak()
+        memory_before, _ = tracemalloc.get_traced_memory()
+
+    start = perf_counter()
     try:
-        # строим обычный граф для заданного гиперграфа
-        # (если пара вершин в гиперграфе смежны, то в обычном графе между ними есть ребро)
-        g = hypergraph_to_graph(hg)
-
-        # находим:
-        #   1) минимальную триангуляцию этого графа (хордальный граф [одно и то же])
-        #   2) minimal elimination ordering
-        #   3) вершины, которые образуют минимальные сепараторы
-        h, meo, generators = find_minimal_triangulation(g)
+        yield
+    finally:
+        if timings is not None:
+            timings[name] = perf_counter() - start
+        if peak_memory is not None:
+            _, peak = tracemalloc.get_traced_memory()
+            peak_memory[name] = peak - memory_before
+
+
+def _build_graph(
+        hg: Hypergraph,
+        compress_twins: bool,
+        drop_subsumed: bool,
+        memory_budget: int | None = None
+) -> tuple[Graph | CSRGraph, dict[str, list[str]] | None]:
+    """
+    Граф, в котором ищутся сепараторы; один и тот же для всех точек входа
+
+    @param compress_twins, drop_subsumed, memory_budget: см. find_minimal_clique_separators
+    @return:
+        1) граф смежности гиперграфа (или фактор-граф классов близнецов)
+        2) классы близнецов (None, если они не сжимались)
+    """
+    if memory_budget is not None:
+        return hypergraph_to_csr(hg, memory_budget, None, drop_subsumed, compress_twins)
+    if compress_twins:
+        return compress_twin_vertices(hg, drop_subsumed)
+    return hypergraph_to_graph(hg, drop_subsumed), None
 
-        # находим минимальные кликовые сепараторы
-        cliques = _find_clique_minimal_separators(g, h, meo, generators)
 
-        return cliques
+@contextmanager
+def _separator_errors():
+    """
+    Сообщает об ошибках ValueError одинаково во всех точках входа
+    """
+    try:
+        yield
     except ValueError as e:
         raise ValueError(f"Не удалось найти минимальный кликовый сепаратор: {e}")
 
 
-def hypergraph_to_graph(hg: Hypergraph) -> Graph:
+def iter_minimal_clique_separators(
+        hg: Hypergraph,
+        timeout: float | None = None,
+        max_operations: int | None = None,
+        compress_twins: bool = True,
+        drop_subsumed: bool = True
+) -> "SeparatorEnumeration":
+    """
+    Потоковый вариант find_minimal_clique_separators: сепараторы выдаются по одному,
+    как только они найдены, а поиск прекращается, когда исчерпано ограничение.
+
+    @param hg: гиперграф
+    @param timeout: сколько секунд может занять поиск (считая с начала итерации)
+    @param max_operations: сколько вершин могут обработать MCS-M+ и поиск сепараторов вместе
+    @param compress_twins: искать сепараторы на фактор-графе классов вершин-близнецов
+    @param drop_subsumed: отбросить гиперребра, содержащиеся в других гиперребрах
+    @return: итератор по парам (сепаратор, отделяемый им атом);
+        после окончания итерации его атрибут completed показывает, найдены ли все сепараторы
+    """
+    return SeparatorEnumeration(hg, timeout, max_operations, compress_twins, drop_subsumed)
+
+
+class SeparatorEnumeration:
+    """
+    Итератор по кликовым минимальным сепараторам гиперграфа (см. iter_minimal_clique_separators)
+    """
+
+    def __init__(
+            self,
+            hg: Hypergraph,
+            timeout: float | None,
+            max_operations: int | None,
+            compress_twins: bool,
+            drop_subsumed: bool
+    ):
+        self.completed = False  # найдены ли все сепараторы
+        self.budget: Budget | None = None
+        self._iterator = self._enumerate(hg, timeout, max_operations, compress_twins, drop_subsumed)
+
+    def __iter__(self) -> Iterator[tuple[frozenset[str], frozenset[str] | None]]:
+        return self
+
+    def __next__(self) -> tuple[frozenset[str], frozenset[str] | None]:
+        return next(self._iterator)
+
+    def _enumerate(
+            self,
+            hg: Hypergraph,
+            timeout: float | None,
+            max_operations: int | None,
+            compress_twins: bool,
+            drop_subsumed: bool
+    ) -> Iterator[tuple[frozenset[str], frozenset[str] | None]]:
+        self.budget = Budget(timeout, max_operations)
+        try:
+            with _separator_errors():
+                g, twins = _build_graph(hg, compress_twins, drop_subsumed)
+
+                h, meo, generators = find_minimal_triangulation(g, self.budget)
+                steps = _iter_clique_minimal_separators(g, h, meo, generators, self.budget)
+                for separator, atom in steps:
+                    if twins is not None:
+                        separator = _expand_twins(separator, twins)
+                        atom = _expand_twins(atom, twins) if atom is not None else None
+                    yield separator, atom
+        except BudgetExceeded:
+            return
+
+        self.completed = True
+
+
+class BudgetExceeded(Exception):
+    """
+    Ограничение на время или количество операций исчерпано
+    """
+
+
+class Budget:
+    """
+    Ограничение на время и количество операций
+    """
+
+    def __init__(self, timeout: float | None = None, max_operations: int | None = None):
+        """
+        @param timeout: сколько секунд отведено на работу
+        @param max_operations: сколько операций можно выполнить
+        """
+        self.deadline = perf_counter() + timeout if timeout is not None else None
+        self.max_operations = max_operations
+        self.operations = 0
+
+    def spend(self):
+        """
+        Учитывает одну операцию
+
+        @raise BudgetExceeded: ограничение исчерпано
+        """
+        self.operations += 1
+        if self.max_operations is not None and self.operations > self.max_operations:
+            raise BudgetExceeded(f"выполнено {self.max_operations} операций")
+        if self.deadline is not None and perf_counter() > self.deadline:
+            raise BudgetExceeded("время истекло")
+
+
+def find_compact_clique_separators(hg: Hypergraph, **kwargs) -> SeparatorSet:
+    """
+    То же, что find_minimal_clique_separators, но результат хранится в компактном виде.
+
+    @param hg: гиперграф
+    @param kwargs: параметры find_minimal_clique_separators
+    @return: все кликовые минимальные сепараторы (номера вершин - по порядку hg.nodes)
+    """
+    separators = find_minimal_clique_separators(hg, **kwargs)
+    return SeparatorSet.from_separators(separators, hg.nodes)
+
+
+def build_clique_tree_index(
+        hg: Hypergraph,
+        compress_twins: bool = True,
+        drop_subsumed: bool = True
+) -> CliqueTreeIndex:
+    """
+    Строит индекс для повторных запросов о сепараторах одного гиперграфа:
+    триангуляция и сепараторы вычисляются один раз.
+
+    @param hg: гиперграф
+    @param compress_twins: искать сепараторы на фактор-графе классов вершин-близнецов
+    @param drop_subsumed: отбросить гиперребра, содержащиеся в других гиперребрах
+    @return: индекс кликовых минимальных сепараторов и атомов гиперграфа
+    """
+    with _separator_errors():
+        g, twins = _build_graph(hg, compress_twins, drop_subsumed)
+        h, meo, generators = find_minimal_triangulation(g)
+        separators = _find_clique_minimal_separators(g, h, meo, generators)
+
+    return CliqueTreeIndex.build(h, meo, separators, twins)
+
+
+def hypergraph_to_graph(hg: Hypergraph, drop_subsumed: bool = True) -> Graph:
     """
     У гиперграфа есть матрица смежности вершин, по которой можно построить обычный граф.
 
     Любая клика обычного графа является кликой гиперграфа.
 
+    Сколько гиперребер и пар вершин было отброшено, записывается в атрибуты графа
+    "subsumed_edges" и "subsumed_pairs".
+
     @param hg: гиперграф
+    @param drop_subsumed: не раскрывать гиперребра, содержащиеся в других гиперребрах
     @return: граф смежности этого гиперграфа
     """
-    g_edges = []
-    for edge in hg.edges:
-        nodes = hg.edges[edge]
-        for i, n1 in enumerate(nodes):
-            for j, n2 in enumerate(nodes):
-                if i <= j:
-                    continue
-                g_edges.append((n1, n2))
-    g = Graph(g_edges)
+    edges, removed_edges, removed_pairs = _reduced_hyperedges(hg, drop_subsumed)
+
+    g = _graph_from_edges(edges.values())
+    g.graph["subsumed_edges"] = removed_edges
+    g.graph["subsumed_pairs"] = removed_pairs
     return g
 
 
-def find_minimal_triangulation(g: Graph) -> tuple[Graph, list[str], list[str]]:
+def hypergraph_to_csr(
+        hg: Hypergraph,
+        memory_budget: int,
+        directory: str | None = None,
+        drop_subsumed: bool = True,
+        compress_twins: bool = True
+) -> tuple[CSRGraph, dict[str, list[str]] | None]:
+    """
+    Граф смежности для гиперграфов, у которых он не помещается в память.
+
+    Пары вершин гиперребер раскрываются по частям, части сбрасываются на диск
+    и сливаются в массив смежности CSR на диске (см. build_csr_graph).
+
+    На диске оказываются только пары вершин. Сами гиперребра (после отбрасывания
+    вложенных), классы близнецов и таблица номеров вершин строятся в памяти
+    и бюджетом не ограничиваются.
+
+    @param hg: гиперграф
+    @param memory_budget: сколько байт памяти можно занять парами вершин одновременно
+        (ограничение только на буферы пар, а не на всю используемую память)
+    @param directory: каталог для файлов графа (по умолчанию - временный каталог)
+    @param drop_subsumed: не раскрывать гиперребра, содержащиеся в других гиперребрах
+    @param compress_twins: строить фактор-граф классов близнецов (см. compress_twin_vertices)
+    @return:
+        1) граф смежности (или фактор-граф) в формате CSR
+        2) классы близнецов (None, если они не сжимались)
+    """
+    edges, removed_edges, removed_pairs = _reduced_hyperedges(hg, drop_subsumed)
+    if compress_twins:
+        twins, edge_nodes = _twin_classes(edges)
+    else:
+        twins, edge_nodes = None, [list(nodes) for nodes in edges.values()]
+    edge_nodes = [nodes for nodes in edge_nodes if len(nodes) > 1]
+
+    # в графе смежности есть только вершины, у которых есть соседи,
+    # и классы близнецов из нескольких вершин
+    ids = {}
+    for nodes in edge_nodes:
+        for node in nodes:
+            ids.setdefault(node, len(ids))
+    if twins is not None:
+        for rep, nodes in twins.items():
+            if len(nodes) > 1:
+                ids.setdefault(rep, len(ids))
+
+    g = build_csr_graph(
+        list(ids),
+        (
+            np.fromiter((ids[node] for node in nodes), dtype=np.int64, count=len(nodes))
+            for nodes in edge_nodes
+        ),
+        memory_budget,
+        directory
+    )
+    g.graph["subsumed_edges"] = removed_edges
+    g.graph["subsumed_pairs"] = removed_pairs
+
+    return g, twins
+
+
+def remove_subsumed_edges(
+        edges: dict[str, frozenset[str]]
+) -> tuple[dict[str, frozenset[str]], int, int]:
+    """
+    Гиперребро, содержащееся в другом гиперребре, не добавляет в граф смежности новых пар
+    вершин, поэтому его можно отбросить до построения графа.
+
+    Гиперребра просматриваются по убыванию размера. Для каждого оставленного гиперребра
+    ведется инвертированный список "вершина -> оставленные гиперребра с этой вершиной",
+    и кандидатами в надмножества проверяются только гиперребра из самого короткого списка
+    среди вершин текущего гиперребра.
+
+    @param edges: гиперребра (метка -> множество вершин)
+    @return:
+        1) оставшиеся гиперребра (в исходном порядке)
+        2) количество отброшенных гиперребер
+        3) количество пар вершин, которые они добавили бы в граф смежности
+    """
+    kept = set()
+    index: dict[str, list[str]] = {}  # вершина -> оставленные гиперребра с этой вершиной
+    removed_edges = 0
+    removed_pairs = 0
+
+    for edge in sorted(edges, key=lambda e: len(edges[e]), reverse=True):
+        nodes = edges[edge]
+        if len(nodes) != 0:
+            rarest = min(nodes, key=lambda node: len(index.get(node, ())))
+            candidates = index.get(rarest, ())
+        else:
+            candidates = kept
+
+        if any(nodes <= edges[candidate] for candidate in candidates):
+            removed_edges += 1
+            removed_pairs += len(nodes) * (len(nodes) - 1) // 2
+            continue
+
+        kept.add(edge)
+        for node in nodes:
+            index.setdefault(node, []).append(edge)
+
+    return (
+        {edge: nodes for edge, nodes in edges.items() if edge in kept},
+        removed_edges,
+        removed_pairs
+    )
+
+
+def compress_twin_vertices(
+        hg: Hypergraph,
+        drop_subsumed: bool = True
+) -> tuple[Graph, dict[str, list[str]]]:
+    """
+    Вершины, входящие в одни и те же гиперребра, являются близнецами в графе смежности:
+    их замкнутые окрестности совпадают. Минимальный сепаратор либо содержит весь
+    класс близнецов, либо не содержит ни одной его вершины, поэтому сепараторы можно
+    искать на фактор-графе, в котором каждый класс стянут в одну вершину.
+
+    @param hg: гиперграф
+    @param drop_subsumed: не учитывать гиперребра, содержащиеся в других гиперребрах
+    @return:
+        1) фактор-граф смежности, вершина которого - представитель класса близнецов
+           (атрибут "weight" - размер класса)
+        2) классы близнецов: представитель -> все вершины класса
+    """
+    edges, removed_edges, removed_pairs = _reduced_hyperedges(hg, drop_subsumed)
+    twins, quotient_edges = _twin_classes(edges)
+
+    g = _graph_from_edges(quotient_edges)
+    g.graph["subsumed_edges"] = removed_edges
+    g.graph["subsumed_pairs"] = removed_pairs
+
+    # класс из нескольких вершин образует клику в графе смежности,
+    # даже если в фактор-графе у него нет соседей
+    for rep, nodes in twins.items():
+        if len(nodes) > 1:
+            g.add_node(rep)
+    for rep in g.nodes:
+        g.nodes[rep]["weight"] = len(twins[rep])
+
+    return g, twins
+
+
+def expand_twin_classes(
+        separators: set[frozenset[str]],
+        twins: dict[str, list[str]]
+) -> set[frozenset[str]]:
+    """
+    @param separators: сепараторы фактор-графа
+    @param twins: классы близнецов (представитель -> все вершины класса)
+    @return: те же сепараторы в исходных вершинах
+    """
+    return {_expand_twins(separator, twins) for separator in separators}
+
+
+def _expand_twins(nodes: Iterable[str], twins: dict[str, list[str]]) -> frozenset[str]:
+    return frozenset(node for rep in nodes for node in twins[rep])
+
+
+def _reduced_hyperedges(
+        hg: Hypergraph,
+        drop_subsumed: bool
+) -> tuple[dict[str, frozenset[str]], int, int]:
+    """
+    @return: гиперребра гиперграфа (см. remove_subsumed_edges)
+    """
+    edges = {edge: frozenset(hg.edges[edge]) for edge in hg.edges}
+    if not drop_subsumed:
+        return edges, 0, 0
+    return remove_subsumed_edges(edges)
+
+
+def _twin_classes(
+        edges: dict[str, frozenset[str]]
+) -> tuple[dict[str, list[str]], list[list[str]]]:
+    """
+    @param edges: гиперребра
+    @return:
+        1) классы близнецов: представитель -> все вершины класса
+        2) гиперребра, в которых вершины заменены представителями своих классов
+    """
+    # сигнатура вершины - множество содержащих ее гиперребер (строка матрицы инцидентности)
+    signatures: dict[str, set[str]] = {}
+    for edge, nodes in edges.items():
+        for node in nodes:
+            signatures.setdefault(node, set()).add(edge)
+
+    classes: dict[frozenset[str], list[str]] = {}
+    for node, signature in signatures.items():
+        classes.setdefault(frozenset(signature), []).append(node)
+
+    # порядок вершин в классе зависит от хешей строк и меняется от процесса к процессу,
+    # а вершины фактор-графа (и снимки поиска) должны быть одними и теми же; repr, а не
+    # сами имена - потому что имена вершин могут быть разных типов
+    twins = {min(nodes, key=repr): nodes for nodes in classes.values()}
+    representative = {
+        node: rep
+        for rep, nodes in twins.items()
+        for node in nodes
+    }
+
+    quotient_edges = [
+        list(dict.fromkeys(representative[node] for node in nodes))
+        for nodes in edges.values()
+    ]
+
+    return twins, quotient_edges
+
+
+def _graph_from_edges(edges: Iterable[Iterable[str]]) -> Graph:
+    """
+    @param edges: гиперребра
+    @return: граф, в котором вершины каждого гиперребра образуют клику
+    """
+    g_edges = []
+    for nodes in edges:
+        g_edges.extend(combinations(nodes, 2))
+    return Graph(g_edges)
+
+
+def find_block_clique_separators(
+        g: Graph,
+        processes: int | None = None,
+        tie_break: str = "first",
+        restarts: int = 1
+) -> set[frozenset[str]]:
+    """
+    Точки сочленения графа - это в точности кликовые минимальные сепараторы из одной вершины,
+    а любой другой кликовый минимальный сепаратор лежит внутри одного блока двусвязности
+    и является кликовым минимальным сепаратором этого блока.
+
+    Поэтому точки сочленения находятся за линейное время, а MCS-M+ и поиск сепараторов
+    запускаются для каждого блока отдельно в пуле процессов.
+
+    @param g: связный неправленный граф
+    @param processes: количество процессов (None - по количеству ядер)
+    @param tie_break, restarts: выбор вершины в MCS-M+ (см. find_minimal_triangulation)
+    @return: множество всех кликовых минимальных сепараторов
+    """
+    _check_graph(g)
+
+    separators = {frozenset([node]) for node in articulation_points(g)}
+
+    # в полном блоке (в том числе в мосте) сепараторов нет
+    blocks = []
+    for block in biconnected_components(g):
+        edges = list(g.subgraph(block).edges)
+        if len(edges) < len(block) * (len(block) - 1) // 2:
+            blocks.append(edges)
+
+    if len(blocks) > 1 and processes != 1:
+        # крупные блоки отправляются первыми, чтобы не ждать их в конце
+        blocks.sort(key=len, reverse=True)
+        with ProcessPoolExecutor(processes) as pool:
+            results = list(pool.map(_find_block_separators, blocks, repeat(tie_break), repeat(restarts)))
+    else:
+        results = map(_find_block_separators, blocks, repeat(tie_break), repeat(restarts))
+
+    for result in results:
+        separators.update(result)
+
+    return separators
+
+
+def _find_block_separators(edges: list[tuple[str, str]], tie_break: str, restarts: int) -> SeparatorSet:
+    """
+    @param edges: ребра блока двусвязности
+    @param tie_break, restarts: выбор вершины в MCS-M+ (см. find_minimal_triangulation)
+    @return: кликовые минимальные сепараторы этого блока
+    """
+    block = Graph(edges)
+    h, meo, generators = find_minimal_triangulation(block, tie_break=tie_break, restarts=restarts)
+    return SeparatorSet.from_separators(_find_clique_minimal_separators(block, h, meo, generators))
+
+
+def find_minimal_triangulation(
+        g: Graph | CSRGraph,
+        budget: Budget | None = None,
+        checkpoint: Checkpoint | None = None,
+        tie_break: str = "first",
+        restarts: int = 1,
+        seed: int = 0
+) -> tuple[FilledGraph, list[str], list[str]]:
     """
     Реализация алгоритма MCS-M+.
 
     источник:
     https://hal-lirmm.ccsd.cnrs.fr/lirmm-00485851/document#:~:text=Clique%20minimal%20separator%20decomposition%20is,be%20explained%20in%20detail%20further.
 
+    Исходный граф не изменяется и не копируется: он читается только через g.neighbors,
+    поэтому вместо networkx.Graph можно передать граф смежности на диске (CSRGraph).
+    Пронумерованные вершины - это вершины, у которых уже нет метки.
+    Триангуляция хранится как исходный граф плюс ребра заполнения (FilledGraph).
+
     @param g: связный неправленный граф
+    @param budget: ограничение на время и количество операций (операция - нумерация вершины)
+    @param checkpoint: снимки состояния (связанные с g через checkpoint.attach);
+        если загружен снимок, нумерация продолжается с него
+    @param tie_break: какую вершину нумеровать, если максимальная метка у нескольких
+        (см. TIE_BREAKS); от выбора зависит количество ребер заполнения и генераторов
+    @param restarts: сколько раз запускать MCS-M+ при случайном выборе (tie_break="random");
+        остается триангуляция с наименьшим количеством ребер заполнения
+    @param seed: начальное значение генератора случайных чисел (у i-го запуска - seed + i)
     @return:
         1) его минимальная триангуляция (хордальный граф [это одно и то же])
         2) minimal elimination ordering
         3) вершины, которые образуют минимальные сепараторы
+    @raise BudgetExceeded: ограничение исчерпано
     """
-    if not is_connected(g):
-        raise ValueError("граф несвязный")
-    if g.is_directed():
-        raise ValueError("граф направленный")
+    if tie_break not in TIE_BREAKS:
+        raise ValueError(f"неизвестный способ выбора вершины: {tie_break}")
+    if tie_break == "random" and checkpoint is not None:
+        raise ValueError("снимки состояния не поддерживаются при случайном выборе вершины")
+
+    if tie_break == "random" and restarts > 1:
+        best = None
+        for i in range(restarts):
+            result = find_minimal_triangulation(g, budget, None, tie_break, 1, seed + i)
+            if best is None or result[0].number_of_fill_edges() < best[0].number_of_fill_edges():
+                best = result
+        return best
+
+    _check_graph(g)
+    rng = Random(seed)
 
     n = len(g.nodes)
 
-    g_ = Graph(g)  # копия оригинального графа, с которым мы далее работаем
-    h = Graph(g)  # хордальный граф, который мы пытаемся построить
+    h = FilledGraph(g)  # хордальный граф, который мы пытаемся построить
 
     meo = []  # minimal elimination ordering
     generators = []  # вершины, которые образуют минимальные сепараторы
 
-    label = {node: 0 for node in g_.nodes}  # метки вершин
+    label = {node: 0 for node in g.nodes}  # метки еще не пронумерованных вершин
     s = -1
 
-    for i in range(1, n + 1):
-        x = max(label.items(), key=lambda p: p[1])[0]  # находим вершину с максимальной меткой
-        Y = set(g_.neighbors(x))  # находим соседние вершины этой вершины
+    restored = checkpoint.restore_triangulation() if checkpoint is not None else None
+    if restored is not None:
+        label, s, meo, generators, fill = restored
+        for u, v in fill:
+            h.add_fill_edge(u, v)
+
+    for i in range(len(meo) + 1, n + 1):
+        if budget is not None:
+            budget.spend()
+
+        x = _choose_vertex(g, label, tie_break, rng)  # находим вершину с максимальной меткой
+        Y = {y for y in g.neighbors(x) if y in label}  # находим соседние вершины этой вершины
 
         if label[x] <= s:
             generators.append(x)
@@ -96,27 +714,88 @@ def find_minimal_triangulation(g: Graph) -> tuple[Graph, list[str], list[str]]:
             while reach[j] != set():
                 y = reach[j].pop()  # удаляем вершину
 
-                for z in g_.neighbors(y):
-                    if z not in reached:
+                for z in g.neighbors(y):
+                    if z in label and z not in reached:
                         reached.add(z)
                         if label[z] > j:
                             Y.add(z)
+                            h.add_fill_edge(x, z)  # добавляем ребро к хордальному графу
                             if label[z] not in reach:
                                 reach[label[z]] = set()
                             reach[label[z]].add(z)
                         else:
-                            reach[j].add(y)
+                            reach[j].add(z)
         for y in Y:
-            h.add_edge(x, y)  # добавляем ребро к хордальному графу
             label[y] += 1
 
         meo.append(x)
-        g_.remove_node(x)
         del label[x]
 
+        if checkpoint is not None and checkpoint.due():
+            checkpoint.save_triangulation(label, s, meo, generators, h)
+
+    if checkpoint is not None:
+        checkpoint.finish_triangulation(meo, generators, h)
+
     return h, meo, generators
 
 
+def _choose_vertex(g: Graph | CSRGraph, label: dict[str, int], tie_break: str, rng: Random) -> str:
+    """
+    @param label: метки еще не пронумерованных вершин
+    @param tie_break: способ выбора среди вершин с максимальной меткой (см. TIE_BREAKS)
+    @return: вершина с максимальной меткой
+    """
+    top = max(label.values())
+    if tie_break == "first":
+        return next(node for node, l in label.items() if l == top)
+
+    ties = [node for node, l in label.items() if l == top]
+    if len(ties) == 1:
+        return ties[0]
+
+    if tie_break == "min_degree":
+        return min(ties, key=g.degree)
+    if tie_break == "lexicographic":
+        return min(ties)
+    if tie_break == "min_fill":
+        return min(ties, key=lambda x: _fill_estimate(g, x, label))
+    return rng.choice(ties)
+
+
+def _fill_estimate(g: Graph | CSRGraph, x: str, label: dict[str, int]) -> int:
+    """
+    @return: сколько пар еще не пронумерованных соседей x не смежны в исходном графе
+        (столько ребер добавило бы исключение x прямо сейчас)
+    """
+    neighbors = {y for y in g.neighbors(x) if y in label}
+    adjacent = sum(1 for y in neighbors for z in g.neighbors(y) if z in neighbors)
+    return len(neighbors) * (len(neighbors) - 1) // 2 - adjacent // 2
+
+
+def _check_graph(g: Graph | CSRGraph):
+    """
+    Проверяет, что в графе можно искать кликовые минимальные сепараторы
+    """
+    if len(g) == 0:
+        raise ValueError("граф пустой")
+    if g.is_directed():
+        raise ValueError("граф направленный")
+
+    # обход в ширину из произвольной вершины
+    start = next(iter(g))
+    visited = {start}
+    queue = [start]
+    while len(queue) != 0:
+        node = queue.pop()
+        for neighbor in g.neighbors(node):
+            if neighbor not in visited:
+                visited.add(neighbor)
+                queue.append(neighbor)
+    if len(visited) != len(g):
+        raise ValueError("граф несвязный")
+
+
 def is_clique(g: Graph, nodes: set[str]) -> bool:
     """
     @param g: граф
@@ -133,50 +812,128 @@ def is_clique(g: Graph, nodes: set[str]) -> bool:
 
 
 def _find_clique_minimal_separators(
-        g: Graph,
-        h: Graph,
+        g: Graph | CSRGraph,
+        h: FilledGraph,
         meo: list[str],
-        generators: list[str]
+        generators: list[str],
+        checkpoint: Checkpoint | None = None
 ) -> set[frozenset[str]]:
+    """
+    @param g: исходный граф
+    @param h: его минимальная триангуляция(хордальный граф)
+    @param meo: minimal elimination ordering
+    @param generators: вершины, которые образуют минимальные сепараторы
+    @param checkpoint: снимки состояния поиска
+    @return: множество всех кликовых минимальных сепараторов
+    """
+    return {
+        separator
+        for separator, _ in _iter_clique_minimal_separators(g, h, meo, generators, checkpoint=checkpoint)
+    }
+
+
+def _iter_clique_minimal_separators(
+        g: Graph | CSRGraph,
+        h: FilledGraph,
+        meo: list[str],
+        generators: list[str],
+        budget: Budget | None = None,
+        checkpoint: Checkpoint | None = None
+) -> Iterator[tuple[frozenset[str], frozenset[str] | None]]:
     """
     источник:
     https://hal-lirmm.ccsd.cnrs.fr/lirmm-00485851/document#:~:text=Clique%20minimal%20separator%20decomposition%20is,be%20explained%20in%20detail%20further.
 
+    Ни исходный граф, ни триангуляция не копируются: вершины, которые исключаются раньше
+    текущей, отсекаются по номеру в meo, а отделенные атомы - множеством removed.
+
     @param g: исходный граф
     @param h: его минимальная триангуляция(хордальный граф)
     @param meo: minimal elimination ordering
     @param generators: вершины, которые образуют минимальные сепараторы
-    @return: множество всех кликовых минимальных сепараторов
+    @param budget: ограничение на время и количество операций
+    @param checkpoint: снимки состояния; если в загруженном снимке поиск уже начат,
+        он продолжается с сохраненной позиции
+    @return: каждый кликовый минимальный сепаратор (один раз) сразу после того, как он найден,
+        вместе с атомом, который он отделяет (None, если атом уже был отделен ранее;
+        сепараторы из снимка выдаются первыми, тоже без атомов)
+    @raise BudgetExceeded: ограничение исчерпано
     """
-    g_ = Graph(g)  # копия исходного графа
-    h_ = Graph(h)  # копия хордального графа
+    rank = {x: i for i, x in enumerate(meo)}  # номер вершины в minimal elimination ordering
+    generators = set(generators)
+    removed = set()  # вершины, уже отделенные от графа вместе со своими атомами
     separators = set()  # сепараторы графа
+    order = meo[::-1]
+    start = 0
+
+    restored = checkpoint.restore_sweep() if checkpoint is not None else None
+    if restored is not None:
+        start, removed, separators = restored
+        for separator in separators:
+            yield separator, None
+
+    for position in range(start, len(order)):
+        x = order[position]
+        if checkpoint is not None and checkpoint.due():
+            checkpoint.save_sweep(position, removed, separators)
+        if budget is not None:
+            budget.spend()
 
-    for x in meo[::-1]:
         if x in generators:
-            separator = set(h_.neighbors(x))
+            # соседи x в триангуляции, которые исключаются позже x
+            separator = {y for y in h.neighbors(x) if rank[y] < rank[x]}
 
             if is_clique(g, separator):
                 if len(separator) == 0:
                     continue
-                separators.add(frozenset(separator))
-
-                tmp_g = Graph(g_)
-                tmp_g.remove_nodes_from(separator)
-                components = [*connected_components(tmp_g)]
-                if len(components) == 1:
-                    raise RuntimeError("сепаратор не разделяет граф :(")
-
-                for component in components:
-                    if x in component:
-                        g_.remove_nodes_from(component)
-                        component.update(separator)
-                        if len(component) == 0:
-                            raise RuntimeError
-                        break
-        h_.remove_node(x)
 
-    return separators
+                component = _separated_component(g, x, separator, removed)
+                if component is not None:
+                    removed.update(component)
+
+                separator = frozenset(separator)
+                if separator not in separators:
+                    separators.add(separator)
+                    atom = separator | component if component is not None else None
+                    yield separator, atom
+
+    if checkpoint is not None:
+        checkpoint.save_sweep(len(order), removed, separators)
+
+
+def _separated_component(
+        g: Graph | CSRGraph,
+        x: str,
+        separator: set[str],
+        removed: set[str]
+) -> set[str] | None:
+    """
+    Компонента связности оставшейся части графа (без вершин removed) после удаления
+    сепаратора, вычисляемая обходом исходного графа без его копирования.
+
+    @return: компонента, содержащая x (None, если x уже удалена из графа)
+    """
+    remaining = len(g) - len(removed) - sum(1 for y in separator if y not in removed)
+
+    start = x
+    if x in removed:
+        start = next((v for v in g if v not in removed and v not in separator), None)
+        if start is None:
+            return None
+
+    component = {start}
+    queue = [start]
+    while len(queue) != 0:
+        node = queue.pop()
+        for neighbor in g.neighbors(node):
+            if neighbor not in component and neighbor not in removed and neighbor not in separator:
+                component.add(neighbor)
+                queue.append(neighbor)
+
+    if len(component) == remaining:
+        raise RuntimeError("сепаратор не разделяет граф :(")
+
+    return component if x not in removed else None
 
 
 def generate_hypergraph(n: int, k: int) -> Hypergraph:
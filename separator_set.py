@@ -0,0 +1,212 @@
+import json
+import struct
+from typing import Iterable, Iterator
+
+import numpy as np
+
+# заголовок сериализованного множества:
+# метка формата, количество сепараторов, суммарный размер сепараторов,
+# количество имен и длина таблицы имен в байтах
+_HEADER = struct.Struct("<4sQQQQ")
+_MAGIC = b"SEP2"
+# в первой версии формата имена (только строки) разделялись символом "\0"
+_MAGIC_V1 = b"SEP1"
+_NAMES_SEPARATOR = "\0"
+
+
+class SeparatorSet:
+    """
+    Компактное множество сепараторов.
+
+    Вершины всех сепараторов хранятся подряд в одном массиве целочисленных номеров
+    (формат CSR: вершины i-го сепаратора - indices[indptr[i]:indptr[i + 1]]),
+    а имена вершин - в общей для всех сепараторов таблице names.
+    Номера вершин внутри сепаратора упорядочены по возрастанию.
+
+    Сепараторы превращаются в frozenset только при обращении к ним.
+    """
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, names: list[str]):
+        self.indptr = indptr
+        self.indices = indices
+        self.names = names
+
+        # вспомогательные индексы строятся при первом запросе
+        self._ids: dict[str, int] | None = None
+        self._lookup: dict[bytes, int] | None = None
+        self._inverted: tuple[np.ndarray, np.ndarray] | None = None
+
+    @classmethod
+    def from_separators(
+            cls,
+            separators: Iterable[Iterable[str]],
+            names: Iterable[str] | None = None
+    ) -> "SeparatorSet":
+        """
+        @param separators: сепараторы (повторы отбрасываются)
+        @param names: таблица имен вершин; по умолчанию - вершины в порядке появления
+        @return: компактное множество этих сепараторов
+        """
+        names = list(dict.fromkeys(names)) if names is not None else []
+        ids = {name: i for i, name in enumerate(names)}
+
+        rows = {}
+        for separator in separators:
+            row = []
+            for node in separator:
+                if node not in ids:
+                    ids[node] = len(names)
+                    names.append(node)
+                row.append(ids[node])
+            row = np.unique(np.asarray(row, dtype=np.int32))
+            rows.setdefault(row.tobytes(), row)
+
+        sizes = np.fromiter((len(row) for row in rows.values()), dtype=np.int64, count=len(rows))
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=indptr[1:])
+        if len(rows) != 0:
+            indices = np.concatenate(list(rows.values())).astype(np.int32, copy=False)
+        else:
+            indices = np.zeros(0, dtype=np.int32)
+
+        return cls(indptr, indices, names)
+
+    def __len__(self) -> int:
+        return len(self.indptr) - 1
+
+    def __getitem__(self, i: int) -> frozenset[str]:
+        return frozenset(self.names[node] for node in self.ids(i))
+
+    def __iter__(self) -> Iterator[frozenset[str]]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def __contains__(self, separator: Iterable[str]) -> bool:
+        return self.index(separator) is not None
+
+    def __reduce__(self):
+        # при передаче между процессами pickle получает два массива и таблицу имен,
+        # а не множество объектов frozenset; таблица имен передается как есть,
+        # а не через to_bytes, чтобы имена вершин любого типа не меняли тип
+        return SeparatorSet, (self.indptr, self.indices, self.names)
+
+    def ids(self, i: int) -> np.ndarray:
+        """
+        @param i: номер сепаратора
+        @return: номера вершин этого сепаратора
+        """
+        if not 0 <= i < len(self):
+            raise IndexError(f"Нет сепаратора с номером {i}")
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    @property
+    def sizes(self) -> np.ndarray:
+        """
+        @return: размеры всех сепараторов
+        """
+        return np.diff(self.indptr)
+
+    def sorted_by_size(self) -> np.ndarray:
+        """
+        @return: номера сепараторов по возрастанию их размера
+        """
+        return np.argsort(self.sizes, kind="stable")
+
+    def index(self, separator: Iterable[str]) -> int | None:
+        """
+        @param separator: множество вершин
+        @return: номер сепаратора, совпадающего с этим множеством (None, если такого нет)
+        @raise TypeError: передана строка, а не множество вершин
+        """
+        if isinstance(separator, str):
+            # иначе имя одной вершины было бы прочитано как множество ее символов
+            raise TypeError(f"Ожидалось множество вершин, а не строка {separator!r}")
+
+        if self._lookup is None:
+            self._lookup = {
+                self.ids(i).tobytes(): i
+                for i in range(len(self))
+            }
+
+        node_ids = self._node_ids()
+        row = []
+        for node in separator:
+            if node not in node_ids:
+                return None
+            row.append(node_ids[node])
+        row = np.unique(np.asarray(row, dtype=np.int32))
+        return self._lookup.get(row.tobytes())
+
+    def containing(self, node: str) -> np.ndarray:
+        """
+        @param node: вершина
+        @return: номера сепараторов, в которые входит эта вершина
+        """
+        if self._inverted is None:
+            # транспонированная матрица: вершина -> сепараторы с этой вершиной
+            order = np.argsort(self.indices, kind="stable")
+            owners = np.repeat(np.arange(len(self), dtype=np.int32), self.sizes)[order]
+            counts = np.bincount(self.indices, minlength=len(self.names))
+            offsets = np.zeros(len(self.names) + 1, dtype=np.int64)
+            np.cumsum(counts, out=offsets[1:])
+            self._inverted = (offsets, owners)
+
+        node_id = self._node_ids().get(node)
+        if node_id is None:
+            return np.zeros(0, dtype=np.int32)
+        offsets, owners = self._inverted
+        return owners[offsets[node_id]:offsets[node_id + 1]]
+
+    def as_set(self) -> set[frozenset[str]]:
+        """
+        @return: все сепараторы в виде множества frozenset
+        """
+        return set(self)
+
+    def to_bytes(self) -> bytes:
+        """
+        Таблица имен хранится в JSON, так что имена-строки и имена-числа
+        восстанавливаются с тем же типом.
+
+        @return: сериализованное множество сепараторов
+        @raise TypeError: имя вершины - не строка и не целое число
+        """
+        for name in self.names:
+            if not isinstance(name, (str, int)):
+                raise TypeError(f"Имя вершины {name!r} не строка и не целое число, его нельзя сохранить")
+        names = json.dumps(self.names, ensure_ascii=False).encode("utf-8")
+        header = _HEADER.pack(_MAGIC, len(self), len(self.indices), len(self.names), len(names))
+        return b"".join((
+            header,
+            self.indptr.astype("<i8", copy=False).tobytes(),
+            self.indices.astype("<i4", copy=False).tobytes(),
+            names,
+        ))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "SeparatorSet":
+        """
+        @param data: результат to_bytes
+        @return: восстановленное множество сепараторов
+        """
+        magic, n, nnz, names_count, names_len = _HEADER.unpack_from(data)
+        if magic not in (_MAGIC, _MAGIC_V1):
+            raise ValueError("Данные не являются сериализованным множеством сепараторов")
+
+        offset = _HEADER.size
+        indptr = np.frombuffer(data, dtype="<i8", count=n + 1, offset=offset)
+        offset += indptr.nbytes
+        indices = np.frombuffer(data, dtype="<i4", count=nnz, offset=offset)
+        offset += indices.nbytes
+        names = data[offset:offset + names_len].decode("utf-8")
+        if magic == _MAGIC:
+            names = json.loads(names)
+        else:
+            names = names.split(_NAMES_SEPARATOR) if names_count else []
+
+        return cls(indptr, indices, names)
+
+    def _node_ids(self) -> dict[str, int]:
+        if self._ids is None:
+            self._ids = {name: i for i, name in enumerate(self.names)}
+        return self._ids
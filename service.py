@@ -0,0 +1,341 @@
+"""
+Локальный сервис поиска кликовых минимальных сепараторов.
+
+Сервис держит пул заранее запущенных процессов, в которых уже импортированы
+hypernetx, networkx и numpy, поэтому каждый запрос не платит за запуск интерпретатора.
+
+Запрос: POST /decompose с телом {"edges": {"e1": ["v1", "v2"], ...}}
+Ответ: {"separators": [["v1"], ...], "timings": {"graph": ..., ...},
+        "subsumed": {"edges": ..., "pairs": ...}}
+
+Мелкие запросы собираются в пакеты и отправляются в пул одной задачей.
+Если очередь запросов заполнена, сервис отвечает 503 и заголовком Retry-After.
+Если процесс пула аварийно завершился (например, его убил OOM killer), запросы
+его пакетов завершаются ошибкой, а пул запускается заново.
+"""
+import argparse
+import json
+import os
+import queue
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import monotonic, perf_counter
+
+from hypernetx import Hypergraph
+
+from hypergraph_utils import find_minimal_clique_separators
+
+
+class DecompositionService:
+    """
+    Очередь запросов, поток, собирающий из нее пакеты, и пул процессов, который их обрабатывает
+    """
+
+    def __init__(
+            self,
+            workers: int | None = None,
+            batch_size: int = 16,
+            batch_window: float = 0.005,
+            queue_size: int = 1024,
+            timeout: float = 300
+    ):
+        """
+        @param workers: количество процессов (None - по количеству ядер)
+        @param batch_size: наибольшее количество запросов в одном пакете
+        @param batch_window: сколько секунд ждать, пока пакет наберется
+        @param queue_size: наибольшее количество ожидающих запросов
+        @param timeout: сколько секунд ждать ответа на один запрос; по истечении времени
+            клиент получает 504, но уже отправленный в пул пакет не отменяется
+            и продолжает занимать процесс, пока не завершится
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.timeout = timeout
+
+        self.queue: queue.Queue[tuple[dict, Future]] = queue.Queue(maxsize=queue_size)
+        self.pool = ProcessPoolExecutor(self.workers)
+
+        # в пуле одновременно не больше двух пакетов на процесс, остальные запросы
+        # ждут в очереди, а при ее заполнении новые запросы отклоняются
+        self._in_flight = threading.BoundedSemaphore(2 * self.workers)
+        self._stopped = threading.Event()
+        self._pool_broken = threading.Event()  # процесс пула аварийно завершился
+        self.restarts = 0  # сколько раз пул запускался заново
+        self._dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+
+    def start(self):
+        """
+        Запускает все процессы пула и поток сборки пакетов
+        """
+        self._warm_up()
+        self._dispatcher.start()
+
+    @property
+    def dispatcher_alive(self) -> bool:
+        return self._dispatcher.is_alive()
+
+    @property
+    def pool_broken(self) -> bool:
+        """
+        @return: завершился ли аварийно процесс пула (пул будет запущен заново
+            перед отправкой следующего пакета)
+        """
+        return self._pool_broken.is_set()
+
+    @property
+    def healthy(self) -> bool:
+        """
+        @return: работают ли поток сборки пакетов и пул процессов
+        """
+        return self.dispatcher_alive and not self.pool_broken
+
+    def stop(self):
+        self._stopped.set()
+        self._dispatcher.join()
+        self.pool.shutdown(cancel_futures=True)
+
+        # запросы, до которых не дошла очередь, завершаются ошибкой
+        while not self.queue.empty():
+            _, future = self.queue.get_nowait()
+            future.set_exception(RuntimeError("сервис остановлен"))
+
+    def submit(self, request: dict) -> Future:
+        """
+        @param request: запрос {"edges": {...}}
+        @return: будущий ответ на запрос
+        @raise queue.Full: очередь запросов заполнена
+        """
+        future = Future()
+        self.queue.put_nowait((request, future))
+        return future
+
+    def _dispatch(self):
+        while not self._stopped.is_set():
+            try:
+                batch = [self.queue.get(timeout=0.1)]
+            except queue.Empty:
+                continue
+
+            deadline = monotonic() + self.batch_window
+            while len(batch) < self.batch_size:
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self._in_flight.acquire()
+            requests = [request for request, _ in batch]
+            futures = [future for _, future in batch]
+            try:
+                result = self._submit(requests)
+            except Exception as e:
+                # поток сборки пакетов не должен завершаться из-за ошибки одного пакета
+                self._in_flight.release()
+                self._fail(futures, e)
+                if isinstance(e, BrokenProcessPool):
+                    self._pool_broken.set()
+                continue
+            result.add_done_callback(lambda r, f=futures: self._complete(r, f))
+
+    def _submit(self, requests: list[dict]) -> Future:
+        """
+        Отправляет пакет в пул; сломанный пул перед этим запускается заново
+        """
+        if self._pool_broken.is_set():
+            self._restart_pool()
+        try:
+            return self.pool.submit(_decompose_batch, requests)
+        except BrokenProcessPool:
+            # пакет еще не начал выполняться, поэтому его можно отправить в новый пул
+            self._restart_pool()
+            return self.pool.submit(_decompose_batch, requests)
+
+    def _warm_up(self):
+        """
+        Запускает все процессы пула
+        """
+        warmup = [self.pool.submit(_warmup) for _ in range(self.workers)]
+        for future in warmup:
+            future.result()
+
+    def _restart_pool(self):
+        """
+        Заменяет сломанный пул новым
+        """
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        self.pool = ProcessPoolExecutor(self.workers)
+        self._warm_up()
+        self._pool_broken.clear()
+        self.restarts += 1
+
+    def _complete(self, result: Future, futures: list[Future]):
+        self._in_flight.release()
+        try:
+            responses = result.result()
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                self._pool_broken.set()
+            self._fail(futures, e)
+        else:
+            for future, response in zip(futures, responses):
+                future.set_result(response)
+
+    @staticmethod
+    def _fail(futures: list[Future], error: Exception):
+        for future in futures:
+            future.set_exception(error)
+
+
+def _warmup() -> int:
+    return os.getpid()
+
+
+def _decompose_batch(requests: list[dict]) -> list[dict]:
+    """
+    Выполняется в процессе пула
+
+    Ошибка одного запроса не затрагивает остальные запросы пакета:
+    она превращается в ответ {"error": ...} на этот запрос.
+
+    @param requests: пакет запросов
+    @return: ответы на запросы в том же порядке
+    """
+    responses = []
+    for request in requests:
+        try:
+            responses.append(_decompose(request))
+        except Exception as e:
+            responses.append({"error": f"{type(e).__name__}: {e}"})
+    return responses
+
+
+def _decompose(request: dict) -> dict:
+    timings = {}
+    start = perf_counter()
+
+    edges = request["edges"]
+    if not isinstance(edges, dict):
+        raise ValueError("\"edges\" должен быть словарем: гиперребро -> список вершин")
+    hg = Hypergraph(edges)
+    subsumed = {}
+    separators = find_minimal_clique_separators(hg, timings=timings, subsumed=subsumed)
+    timings["total"] = perf_counter() - start
+
+    # имена вершин могут быть и числами, и строками, поэтому сравниваются как строки
+    separators = sorted((sorted(separator, key=str) for separator in separators), key=len)
+    return {"separators": separators, "timings": timings, "subsumed": subsumed}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    service: DecompositionService
+
+    def do_GET(self):
+        if self.path != "/health":
+            self._reply(HTTPStatus.NOT_FOUND, {"error": "неизвестный адрес"})
+            return
+        healthy = self.service.healthy
+        self._reply(HTTPStatus.OK if healthy else HTTPStatus.SERVICE_UNAVAILABLE, {
+            "healthy": healthy,
+            "dispatcher_alive": self.service.dispatcher_alive,
+            "pool_broken": self.service.pool_broken,
+            "pool_restarts": self.service.restarts,
+            "workers": self.service.workers,
+            "queued": self.service.queue.qsize(),
+        })
+
+    def do_POST(self):
+        if self.path != "/decompose":
+            self._reply(HTTPStatus.NOT_FOUND, {"error": "неизвестный адрес"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length))
+        except ValueError as e:
+            self._reply(HTTPStatus.BAD_REQUEST, {"error": f"некорректный JSON: {e}"})
+            return
+
+        try:
+            future = self.service.submit(request)
+        except queue.Full:
+            self._reply(HTTPStatus.SERVICE_UNAVAILABLE, {"error": "очередь запросов заполнена"},
+                        headers={"Retry-After": "1"})
+            return
+
+        try:
+            response = future.result(timeout=self.service.timeout)
+        except FutureTimeoutError:
+            # до Python 3.11 это не встроенный TimeoutError; пакет в пуле при этом не отменяется
+            self._reply(HTTPStatus.GATEWAY_TIMEOUT, {"error": "превышено время ожидания"})
+            return
+        except Exception as e:
+            self._reply(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(e).__name__}: {e}"})
+            return
+
+        status = HTTPStatus.OK if "error" not in response else HTTPStatus.UNPROCESSABLE_ENTITY
+        self._reply(status, response)
+
+    def _reply(self, status: HTTPStatus, body: dict, headers: dict[str, str] | None = None):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # лишние подключения должны получать 503 из обработчика, а не отказ в соединении
+    request_queue_size = 256
+
+
+def serve(host: str, port: int, service: DecompositionService):
+    """
+    Запускает HTTP-сервер и обслуживает запросы до прерывания
+    """
+    handler = type("Handler", (_Handler,), {"service": service})
+    server = _Server((host, port), handler)
+
+    service.start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Сервис поиска кликовых минимальных сепараторов")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--batch-window", type=float, default=0.005)
+    parser.add_argument("--queue-size", type=int, default=1024)
+    args = parser.parse_args()
+
+    serve(
+        args.host,
+        args.port,
+        DecompositionService(
+            workers=args.workers,
+            batch_size=args.batch_size,
+            batch_window=args.batch_window,
+            queue_size=args.queue_size,
+        )
+    )
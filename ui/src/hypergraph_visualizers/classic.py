@@ -1,15 +1,24 @@
 import networkx as nx
-from hypernetx.drawing.rubber_band import layout_node_link
+import numpy as np
+from hypernetx.drawing.rubber_band import layout_node_link, layout_hyper_edges, \
+    get_default_radius, cp
+from matplotlib.collections import PolyCollection
+from matplotlib.text import Annotation, Text
 
 from ui.src.hypergraph_visualizers import Axes, Hypergraph, \
     HypergraphVisualizer, Coloring, create_color_mapping
 
-import hypernetx as hnx
+# полупрозрачный фон под подписями, как в hnx.draw
+LABEL_BACKGROUND = (1, 1, 1, 0.35)
 
 
 class Classic(HypergraphVisualizer):
     """
     Классическое представление гиперграфа
+
+    Выпуклые оболочки гиперребер вычисляются один раз для каждой разметки. Все гиперребра
+    рисуются одной коллекцией многоугольников, все вершины - другой. Коллекции и подписи
+    переиспользуются при перерисовке, а при смене раскраски меняются только цвета вершин.
     """
 
     def __init__(self):
@@ -17,30 +26,110 @@ class Classic(HypergraphVisualizer):
         self.pos: dict | None = None
         self.facecolors = "black"
 
+        # геометрия текущей разметки
+        self.nodes: list[str] | None = None
+        self.edges: list[str] | None = None
+        self.node_radius: float | None = None
+        self.hulls: list[np.ndarray] | None = None
+
+        # готовые к отрисовке объекты и область, для которой они созданы
+        self.artists_axes: Axes | None = None
+        self.edge_polys: PolyCollection | None = None
+        self.node_polys: PolyCollection | None = None
+        self.labels: list[Text] = []
+
     def _draw(
             self,
             axes: Axes,
             hypergraph: Hypergraph,
             coloring: Coloring | None
     ):
-        hnx.draw(
-            hypergraph,
-            ax=axes,
-            pos=self.pos,
-            edges_kwargs={
-                "edgecolors": "gray"
-            },
-            nodes_kwargs={
-                "facecolors": self.facecolors,
-            },
-            node_labels={
-                "fontsize": 10,
-            }
+        if self.artists_axes is not axes:
+            self._create_artists(axes)
+
+        self.node_polys.set_facecolors(self.facecolors)
+
+        # область отрисовки очищается перед каждой отрисовкой,
+        # поэтому готовые объекты добавляются в нее заново
+        axes.add_collection(self.edge_polys)
+        for label in self.labels:
+            axes.add_artist(label)
+        axes.add_collection(self.node_polys)
+
+        if len(self.nodes) == 1:
+            x, y = self.pos[self.nodes[0]]
+            s = 20
+            axes.axis([x - s, x + s, y - s, y + s])
+        else:
+            axes.axis("equal")
+        axes.axis("off")
+
+    def _create_artists(self, axes: Axes):
+        """
+        Создает коллекции многоугольников и подписи для текущей разметки
+        """
+        self.edge_polys = PolyCollection(
+            self.hulls,
+            edgecolors="gray",
+            facecolors="none",
+        )
+        self.node_polys = PolyCollection(
+            [self.node_radius * cp + self.pos[node] for node in self.nodes],
+            facecolors=self.facecolors,
         )
 
+        self.labels = []
+
+        # подпись гиперребра - на самой длинной стороне его оболочки, вдоль этой стороны
+        for edge, hull in zip(self.edges, self.hulls):
+            vertices = np.vstack([hull, hull[:1]])
+            i = ((vertices[:-1] - vertices[1:]) ** 2).sum(axis=1).argmax()
+            x1, x2 = vertices[i:i + 2]
+            dx, dy = x2 - x1
+            angle = (np.degrees(np.arctan2(dy, dx)) + 360) % 360
+            while angle > 90:
+                angle -= 180
+
+            self.labels.append(Text(
+                *((x1 + x2) / 2),
+                str(edge),
+                rotation=angle,
+                ha="center",
+                va="center",
+                color="gray",
+                backgroundcolor=LABEL_BACKGROUND,
+            ))
+
+        # подпись вершины - справа от нее
+        for node in self.nodes:
+            x, y = self.pos[node]
+            self.labels.append(Annotation(
+                str(node),
+                (x + self.node_radius, y),
+                xytext=(5, 0),
+                textcoords="offset points",
+                va="center",
+                fontsize=10,
+                backgroundcolor=LABEL_BACKGROUND,
+            ))
+
+        self.artists_axes = axes
+
     def _calculate_layout(self, hypergraph: Hypergraph, coloring: Coloring | None):
         self.pos = layout_node_link(hypergraph, layout=nx.spring_layout)
 
+        self.nodes = list(hypergraph.nodes)
+        self.edges = list(hypergraph.edges)
+        self.node_radius = get_default_radius(hypergraph, self.pos)
+        self.hulls = layout_hyper_edges(
+            hypergraph,
+            self.pos,
+            node_radius={node: self.node_radius for node in self.nodes}
+        )
+
+        # объекты прошлой разметки больше не нужны
+        self.artists_axes = None
+
     def _calculate_coloring(self, hypergraph: Hypergraph, coloring: Coloring | None):
         if coloring is None:
             self.facecolors = "black"